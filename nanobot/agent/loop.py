@@ -239,6 +239,12 @@ class AgentLoop:
                 pass  # MCP SDK cancel scope cleanup is noisy but harmless
             self._mcp_stack = None
 
+    async def close_tools(self) -> None:
+        """Close HTTP clients held by built-in tools."""
+        search = self.tools.get("web_search")
+        if isinstance(search, WebSearchTool):
+            await search.aclose()
+
     def stop(self) -> None:
         """Stop the agent loop."""
         self._running = False
@@ -420,6 +426,9 @@ Respond with ONLY valid JSON, no markdown fences."""
                 ],
                 model=self.model,
             )
+            if response.finish_reason == "error":
+                logger.warning(f"Memory consolidation: LLM call failed, skipping. {response.content}")
+                return
             text = (response.content or "").strip()
             if not text:
                 logger.warning("Memory consolidation: LLM returned empty response, skipping")
@@ -98,6 +98,7 @@ class SubagentManager:
     ) -> None:
         """Execute the subagent task and announce the result."""
         logger.info(f"Subagent [{task_id}] starting task: {label}")
+        web_search = WebSearchTool(api_key=self.brave_api_key)
         
         try:
             # Build subagent tools (no message tool, no spawn tool)
@@ -112,7 +113,7 @@ class SubagentManager:
                 timeout=self.exec_config.timeout,
                 restrict_to_workspace=self.restrict_to_workspace,
             ))
-            tools.register(WebSearchTool(api_key=self.brave_api_key))
+            tools.register(web_search)
             tools.register(WebFetchTool())
             
             # Build messages with subagent-specific prompt
@@ -182,6 +183,8 @@ class SubagentManager:
             error_msg = f"Error: {str(e)}"
             logger.error(f"Subagent [{task_id}] failed: {e}")
             await self._announce_result(task_id, label, task, error_msg, origin, "error")
+        finally:
+            await web_search.aclose()
     
     async def _announce_result(
         self,
@@ -1,5 +1,6 @@
 """Web tools: web_search and web_fetch."""
 
+import asyncio
 import html
 import json
 import os
@@ -14,6 +15,7 @@ from nanobot.agent.tools.base import Tool
 # Shared constants
 USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_7_2) AppleWebKit/537.36"
 MAX_REDIRECTS = 5  # Limit redirects to prevent DoS attacks
+FETCH_HEADERS = {"User-Agent": USER_AGENT}  # Built once, shared by every fetch
 
 
 def _strip_tags(text: str) -> str:
@@ -60,6 +62,23 @@ class WebSearchTool(Tool):
     def __init__(self, api_key: str | None = None, max_results: int = 5):
         self.api_key = api_key or os.environ.get("BRAVE_API_KEY", "")
         self.max_results = max_results
+        self._client: httpx.AsyncClient | None = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Lazily create one keep-alive client so repeated searches skip the TLS handshake."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url="https://api.search.brave.com/res/v1",
+                headers={"Accept": "application/json", "X-Subscription-Token": self.api_key},
+                timeout=10.0,
+            )
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the keep-alive client, if one was opened."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     async def execute(self, query: str, count: int | None = None, **kwargs: Any) -> str:
         if not self.api_key:
@@ -67,14 +86,8 @@ class WebSearchTool(Tool):
         
         try:
             n = min(max(count or self.max_results, 1), 10)
-            async with httpx.AsyncClient() as client:
-                r = await client.get(
-                    "https://api.search.brave.com/res/v1/web/search",
-                    params={"q": query, "count": n},
-                    headers={"Accept": "application/json", "X-Subscription-Token": self.api_key},
-                    timeout=10.0
-                )
-                r.raise_for_status()
+            r = await self._get_client().get("/web/search", params={"q": query, "count": n})
+            r.raise_for_status()
             
             results = r.json().get("web", {}).get("results", [])
             if not results:
@@ -109,8 +122,6 @@ class WebFetchTool(Tool):
         self.max_chars = max_chars
     
     async def execute(self, url: str, extractMode: str = "markdown", maxChars: int | None = None, **kwargs: Any) -> str:
-        from readability import Document
-
         max_chars = maxChars or self.max_chars
 
         # Validate URL before fetching
@@ -120,26 +131,16 @@ class WebFetchTool(Tool):
 
         try:
             async with httpx.AsyncClient(
+                headers=FETCH_HEADERS,
                 follow_redirects=True,
                 max_redirects=MAX_REDIRECTS,
                 timeout=30.0
             ) as client:
-                r = await client.get(url, headers={"User-Agent": USER_AGENT})
+                r = await client.get(url)
                 r.raise_for_status()
             
-            ctype = r.headers.get("content-type", "")
-            
-            # JSON
-            if "application/json" in ctype:
-                text, extractor = json.dumps(r.json(), indent=2), "json"
-            # HTML
-            elif "text/html" in ctype or r.text[:256].lower().startswith(("<!doctype", "<html")):
-                doc = Document(r.text)
-                content = self._to_markdown(doc.summary()) if extractMode == "markdown" else _strip_tags(doc.summary())
-                text = f"# {doc.title()}\n\n{content}" if doc.title() else content
-                extractor = "readability"
-            else:
-                text, extractor = r.text, "raw"
+            # Decoding + readability parsing is CPU-bound; keep it off the event loop
+            text, extractor = await asyncio.to_thread(self._extract, r, extractMode)
             
             truncated = len(text) > max_chars
             if truncated:
@@ -150,6 +151,23 @@ class WebFetchTool(Tool):
         except Exception as e:
             return json.dumps({"error": str(e), "url": url})
     
+    def _extract(self, r: httpx.Response, extract_mode: str) -> tuple[str, str]:
+        """Extract text from a fetched response. Returns (text, extractor)."""
+        from readability import Document
+
+        ctype = r.headers.get("content-type", "")
+        
+        # JSON
+        if "application/json" in ctype:
+            return json.dumps(r.json(), indent=2), "json"
+        # HTML
+        if "text/html" in ctype or r.text[:256].lower().startswith(("<!doctype", "<html")):
+            doc = Document(r.text)
+            summary, title = doc.summary(), doc.title()
+            content = self._to_markdown(summary) if extract_mode == "markdown" else _strip_tags(summary)
+            return (f"# {title}\n\n{content}" if title else content), "readability"
+        return r.text, "raw"
+    
     def _to_markdown(self, html: str) -> str:
         """Convert HTML to markdown."""
         # Convert links, headings, lists before stripping tags
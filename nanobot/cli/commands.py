@@ -305,6 +305,8 @@ def _make_provider(config: Config):
         default_model=model,
         extra_headers=p.extra_headers if p else None,
         provider_name=provider_name,
+        api_keys=p.api_keys if p else None,
+        max_inflight=p.max_inflight if p else 64,
     )
 
 
@@ -413,11 +415,14 @@ def gateway(
             await asyncio.gather(
                 agent.run(),
                 channels.start_all(),
+                provider.warmup(),
             )
         except KeyboardInterrupt:
             console.print("\nShutting down...")
         finally:
             await agent.close_mcp()
+            await agent.close_tools()
+            await provider.aclose()
             heartbeat.stop()
             cron.stop()
             agent.stop()
@@ -492,6 +497,8 @@ def agent(
                 response = await agent_loop.process_direct(message, session_id)
             _print_agent_response(response, render_markdown=markdown)
             await agent_loop.close_mcp()
+            await agent_loop.close_tools()
+            await provider.aclose()
         
         asyncio.run(run_once())
     else:
@@ -507,6 +514,8 @@ def agent(
         signal.signal(signal.SIGINT, _exit_on_sigint)
         
         async def run_interactive():
+            # Warm the provider connection while the user types the first message
+            warmup = asyncio.create_task(provider.warmup())
             try:
                 while True:
                     try:
@@ -533,7 +542,10 @@ def agent(
                         console.print("\nGoodbye!")
                         break
             finally:
+                warmup.cancel()
                 await agent_loop.close_mcp()
+                await agent_loop.close_tools()
+                await provider.aclose()
         
         asyncio.run(run_interactive())
 
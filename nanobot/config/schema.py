@@ -197,8 +197,10 @@ class ProviderConfig(Base):
     """LLM provider configuration."""
 
     api_key: str = ""
+    api_keys: list[str] = Field(default_factory=list)  # Extra keys, rotated round-robin with api_key
     api_base: str | None = None
     extra_headers: dict[str, str] | None = None  # Custom headers (e.g. APP-Code for AiHubMix)
+    max_inflight: int = 64  # Concurrent requests to this provider; 0 = unlimited
 
 
 class ProvidersConfig(Base):
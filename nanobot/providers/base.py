@@ -5,7 +5,7 @@ from dataclasses import dataclass, field
 from typing import Any
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolCallRequest:
     """A tool call request from the LLM."""
     id: str
@@ -13,7 +13,7 @@ class ToolCallRequest:
     arguments: dict[str, Any]
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class LLMResponse:
     """Response from an LLM provider."""
     content: str | None
@@ -68,3 +68,11 @@ class LLMProvider(ABC):
     def get_default_model(self) -> str:
         """Get the default model for this provider."""
         pass
+
+    async def warmup(self) -> None:
+        """Pre-establish connections to the provider endpoint (optional)."""
+        pass
+
+    async def aclose(self) -> None:
+        """Release network resources held by the provider."""
+        pass
@@ -1,15 +1,194 @@
 """LiteLLM provider implementation for multi-provider support."""
 
+import asyncio
+import contextlib
+import copy
+import hashlib
 import json
 import json_repair
 import os
+import random
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Any
 
+import httpx
+from loguru import logger
+
+# LiteLLM reads its aiohttp pool limits once at import time, so raise them first.
+os.environ.setdefault("AIOHTTP_CONNECTOR_LIMIT", "2000")
+os.environ.setdefault("AIOHTTP_CONNECTOR_LIMIT_PER_HOST", "500")
+
 import litellm
 from litellm import acompletion
 
 from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
-from nanobot.providers.registry import find_by_model, find_gateway
+from nanobot.providers.registry import ProviderSpec, find_by_model, find_by_name, find_gateway
+
+try:
+    # Optional C-accelerated parser for tool-call arguments
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+def _compute_env(
+    spec: ProviderSpec, api_key: str, api_base: str | None, force: bool,
+) -> tuple[dict[str, str], dict[str, str]]:
+    """Compute provider env vars as (forced, defaults) without touching os.environ."""
+    forced: dict[str, str] = {}
+    defaults: dict[str, str] = {}
+    if not spec.env_key:
+        # OAuth/provider-only specs (for example: openai_codex)
+        return forced, defaults
+
+    # Gateway/local overrides existing env; standard provider doesn't
+    (forced if force else defaults)[spec.env_key] = api_key
+
+    # Resolve env_extras placeholders:
+    #   {api_key}  → user's API key
+    #   {api_base} → user's api_base, falling back to spec.default_api_base
+    effective_base = api_base or spec.default_api_base
+    for env_name, env_val in spec.env_extras:
+        resolved = env_val.replace("{api_key}", api_key)
+        resolved = resolved.replace("{api_base}", effective_base)
+        defaults.setdefault(env_name, resolved)
+    return forced, defaults
+
+
+# Errors worth retrying against the same endpoint; anything else (auth, bad
+# request, context window) fails immediately. Timeouts are not retried: each
+# attempt already waited the full request timeout.
+_RETRYABLE_ERRORS = (
+    litellm.RateLimitError,
+    litellm.ServiceUnavailableError,
+    litellm.InternalServerError,
+    litellm.BadGatewayError,
+)
+
+
+def _is_retryable(error: Exception) -> bool:
+    """
+    Whether an error is transient and worth retrying.
+
+    LiteLLM maps any unrecognized provider failure to APIConnectionError, so it
+    is only retried when a socket-level error (httpx transport error or OSError)
+    sits somewhere in its exception chain.
+    """
+    if isinstance(error, _RETRYABLE_ERRORS):
+        return True
+    if not isinstance(error, litellm.APIConnectionError) or isinstance(error, litellm.Timeout):
+        return False
+    seen: set[int] = set()
+    cause = error.__cause__ or error.__context__
+    while cause is not None and id(cause) not in seen:
+        if isinstance(cause, (httpx.TimeoutException, TimeoutError)):
+            return False
+        if isinstance(cause, (httpx.TransportError, OSError)):
+            return True
+        seen.add(id(cause))
+        cause = cause.__cause__ or cause.__context__
+    return False
+
+
+def _retry_after(error: Exception) -> float | None:
+    """Seconds from the error response's Retry-After header, if present and numeric."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        value = float(headers.get("retry-after", ""))
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, value)
+
+
+# Model resolution is a pure function of (gateway, model) and runs on every
+# chat() call, so the registry scans below are memoized.
+
+@lru_cache(maxsize=256)
+def _resolved_model_name(gateway_name: str | None, model: str) -> str:
+    """Resolve model name by applying provider/gateway prefixes."""
+    gateway = find_by_name(gateway_name) if gateway_name else None
+    if gateway:
+        # Gateway mode: apply gateway prefix, skip provider-specific prefixes
+        prefix = gateway.litellm_prefix
+        if gateway.strip_model_prefix:
+            model = model.split("/")[-1]
+        if prefix and not model.startswith(f"{prefix}/"):
+            model = f"{prefix}/{model}"
+        return model
+    
+    # Standard mode: auto-prefix for known providers
+    spec = find_by_model(model)
+    if spec and spec.litellm_prefix:
+        if not any(model.startswith(s) for s in spec.skip_prefixes):
+            model = f"{spec.litellm_prefix}/{model}"
+    
+    return model
+
+
+@lru_cache(maxsize=256)
+def _model_overrides(model: str) -> dict[str, Any] | None:
+    """Return the registry's parameter overrides for a resolved model, if any."""
+    model_lower = model.lower()
+    spec = find_by_model(model)
+    if spec:
+        for pattern, overrides in spec.model_overrides:
+            if pattern in model_lower:
+                return overrides
+    return None
+
+
+@lru_cache(maxsize=256)
+def _supports_prompt_caching(gateway_name: str | None, model: str) -> bool:
+    """Whether cache_control markers reach a provider that honors them."""
+    spec = find_by_model(model)
+    if not (spec and spec.supports_prompt_caching):
+        return False
+    gateway = find_by_name(gateway_name) if gateway_name else None
+    return gateway is None or gateway.supports_prompt_caching
+
+
+# LiteLLM providers served by the OpenAI SDK handler, the only one that uses
+# `litellm.aclient_session`. OpenAI-compatible gateways resolve to "openai/...".
+_SHARED_CLIENT_PROVIDERS = frozenset({"openai", "custom_openai"})
+
+# ~1024 tokens, the smallest prefix Anthropic will cache
+PROMPT_CACHE_MIN_CHARS = 4000
+# Anthropic accepts at most 4 cache breakpoints per request
+PROMPT_CACHE_MAX_MARKERS = 4
+
+
+def _apply_prompt_caching(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Mark long system/user messages as cacheable prompt prefixes.
+
+    Marks the first long message (normally the system prompt) plus the most
+    recent ones, up to PROMPT_CACHE_MAX_MARKERS. Returns a new list; the
+    caller's messages are not modified.
+    """
+    long_idx = [
+        i for i, m in enumerate(messages)
+        if m.get("role") in ("system", "user")
+        and isinstance(m.get("content"), str)
+        and len(m["content"]) > PROMPT_CACHE_MIN_CHARS
+    ]
+    if not long_idx:
+        return messages
+    
+    marked = long_idx[:1] + long_idx[1:][-(PROMPT_CACHE_MAX_MARKERS - 1):]
+    result = list(messages)
+    for i in marked:
+        result[i] = {
+            **messages[i],
+            "content": [{
+                "type": "text",
+                "text": messages[i]["content"],
+                "cache_control": {"type": "ephemeral"},
+            }],
+        }
+    return result
 
 
 class LiteLLMProvider(LLMProvider):
@@ -19,7 +198,25 @@ class LiteLLMProvider(LLMProvider):
     Supports OpenRouter, Anthropic, OpenAI, Gemini, MiniMax, and many other providers through
     a unified interface.  Provider-specific logic is driven by the registry
     (see providers/registry.py) — no if-elif chains needed here.
+
+    Deterministic requests (temperature == 0) are served from an in-process
+    LRU cache keyed on the resolved request, so identical calls skip the
+    network round-trip entirely.
     """
+
+    CACHE_MAXSIZE = 512
+
+    # Transient-failure retries: delay = min(max, base * 2**attempt + jitter),
+    # or the server's Retry-After when it sends one.
+    MAX_RETRIES = 2
+    RETRY_BASE_DELAY = 0.25
+    RETRY_MAX_DELAY = 8.0
+
+    # After ALLOWED_FAILS consecutive failed calls (or a Retry-After hint) a key
+    # is skipped until its cooldown expires instead of re-hitting it; calls fail
+    # fast only while every key is cooling down.
+    ALLOWED_FAILS = 3
+    COOLDOWN_TIME = 30.0
     
     def __init__(
         self, 
@@ -28,11 +225,33 @@ class LiteLLMProvider(LLMProvider):
         default_model: str = "anthropic/claude-opus-4-5",
         extra_headers: dict[str, str] | None = None,
         provider_name: str | None = None,
+        api_keys: list[str] | None = None,
+        max_inflight: int = 64,
     ):
         super().__init__(api_key, api_base)
         self.default_model = default_model
         self.extra_headers = extra_headers or {}
         
+        # Per-endpoint kwargs are constant, so build them once instead of per call
+        # Disable the OpenAI SDK's built-in retries; _acompletion_with_retry is the
+        # only retry layer, so Retry-After and cooldowns are handled in one place.
+        self._endpoint_kwargs: dict[str, Any] = {"max_retries": 0}
+        # Pass api_key directly — more reliable than env vars alone
+        if api_key:
+            self._endpoint_kwargs["api_key"] = api_key
+        # Pass api_base for custom endpoints
+        if api_base:
+            self._endpoint_kwargs["api_base"] = api_base
+        # Pass extra headers (e.g. APP-Code for AiHubMix)
+        if self.extra_headers:
+            self._endpoint_kwargs["extra_headers"] = self.extra_headers
+        
+        # Extra keys for the same provider are rotated round-robin per request,
+        # multiplying the effective rate limit. Cooldown state is tracked per key
+        # ("" stands in when no key is configured).
+        self._keys = list(dict.fromkeys(k for k in [api_key, *(api_keys or [])] if k)) or [""]
+        self._key_index = 0
+        
         # Detect gateway / local deployment.
         # provider_name (from config key) is the primary signal;
         # api_key / api_base are fallback for auto-detection.
@@ -49,59 +268,51 @@ class LiteLLMProvider(LLMProvider):
         litellm.suppress_debug_info = True
         # Drop unsupported parameters for providers (e.g., gpt-5 rejects some params)
         litellm.drop_params = True
+
+        # Exact-match response cache for deterministic (temperature == 0) calls
+        self._cache: OrderedDict[bytes, LLMResponse] = OrderedDict()
+        self._cache_lock = asyncio.Lock()
+        self.stats: dict[str, int] = {"hits": 0, "misses": 0, "cooldown_skips": 0}
+
+        # Bound in-flight requests so bursts queue here instead of exhausting the pool;
+        # max_inflight <= 0 means unlimited.
+        self._semaphore = (
+            asyncio.Semaphore(max_inflight) if max_inflight > 0 else contextlib.nullcontext()
+        )
+
+        # Per-key cooldown state: consecutive failures and (cooldown end, reason)
+        self._fails: dict[str, int] = {}
+        self._cooldowns: dict[str, tuple[float, str]] = {}
+
+        # One pooled client for the provider's lifetime keeps TCP/TLS connections
+        # warm. LiteLLM's OpenAI-compatible handlers pick it up via aclient_session.
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=2000, max_keepalive_connections=1500),
+            timeout=httpx.Timeout(120.0),
+        )
+        litellm.aclient_session = self._http_client
     
     def _setup_env(self, api_key: str, api_base: str | None, model: str) -> None:
         """Set environment variables based on detected provider."""
         spec = self._gateway or find_by_model(model)
         if not spec:
             return
-        if not spec.env_key:
-            # OAuth/provider-only specs (for example: openai_codex)
-            return
-
-        # Gateway/local overrides existing env; standard provider doesn't
-        if self._gateway:
-            os.environ[spec.env_key] = api_key
-        else:
-            os.environ.setdefault(spec.env_key, api_key)
-
-        # Resolve env_extras placeholders:
-        #   {api_key}  → user's API key
-        #   {api_base} → user's api_base, falling back to spec.default_api_base
-        effective_base = api_base or spec.default_api_base
-        for env_name, env_val in spec.env_extras:
-            resolved = env_val.replace("{api_key}", api_key)
-            resolved = resolved.replace("{api_base}", effective_base)
-            os.environ.setdefault(env_name, resolved)
+        forced, defaults = _compute_env(spec, api_key, api_base, force=bool(self._gateway))
+        # Single batched update: forced values win, defaults never clobber existing env
+        updates = {k: v for k, v in defaults.items() if k not in os.environ}
+        updates.update(forced)
+        if updates:
+            os.environ.update(updates)
     
     def _resolve_model(self, model: str) -> str:
         """Resolve model name by applying provider/gateway prefixes."""
-        if self._gateway:
-            # Gateway mode: apply gateway prefix, skip provider-specific prefixes
-            prefix = self._gateway.litellm_prefix
-            if self._gateway.strip_model_prefix:
-                model = model.split("/")[-1]
-            if prefix and not model.startswith(f"{prefix}/"):
-                model = f"{prefix}/{model}"
-            return model
-        
-        # Standard mode: auto-prefix for known providers
-        spec = find_by_model(model)
-        if spec and spec.litellm_prefix:
-            if not any(model.startswith(s) for s in spec.skip_prefixes):
-                model = f"{spec.litellm_prefix}/{model}"
-        
-        return model
+        return _resolved_model_name(self._gateway.name if self._gateway else None, model)
     
     def _apply_model_overrides(self, model: str, kwargs: dict[str, Any]) -> None:
         """Apply model-specific parameter overrides from the registry."""
-        model_lower = model.lower()
-        spec = find_by_model(model)
-        if spec:
-            for pattern, overrides in spec.model_overrides:
-                if pattern in model_lower:
-                    kwargs.update(overrides)
-                    return
+        overrides = _model_overrides(model)
+        if overrides:
+            kwargs.update(overrides)
     
     async def chat(
         self,
@@ -140,31 +351,148 @@ class LiteLLMProvider(LLMProvider):
         # Apply model-specific overrides (e.g. kimi-k2.5 temperature)
         self._apply_model_overrides(model, kwargs)
         
-        # Pass api_key directly — more reliable than env vars alone
-        if self.api_key:
-            kwargs["api_key"] = self.api_key
-        
-        # Pass api_base for custom endpoints
-        if self.api_base:
-            kwargs["api_base"] = self.api_base
+        kwargs.update(self._endpoint_kwargs)
         
-        # Pass extra headers (e.g. APP-Code for AiHubMix)
-        if self.extra_headers:
-            kwargs["extra_headers"] = self.extra_headers
+        # Server-side prompt caching for long, stable prefixes (Anthropic-style markers)
+        if _supports_prompt_caching(self._gateway.name if self._gateway else None, model):
+            kwargs["messages"] = _apply_prompt_caching(messages)
         
         if tools:
             kwargs["tools"] = tools
             kwargs["tool_choice"] = "auto"
         
+        # Only cache when the effective temperature (after overrides) is 0
+        cache_key = None
+        if kwargs["temperature"] == 0:
+            cache_key = self._cache_key(model, messages, tools, max_tokens)
+            async with self._cache_lock:
+                cached = self._cache.get(cache_key)
+                if cached is not None:
+                    self._cache.move_to_end(cache_key)
+                    self.stats["hits"] += 1
+                    return copy.deepcopy(cached)
+                self.stats["misses"] += 1
+        
+        # Skip doomed calls while every key is cooling down
+        remaining, reason = self._cooldown_status()
+        if remaining > 0:
+            self.stats["cooldown_skips"] += 1
+            return LLMResponse(
+                content=f"Error calling LLM: {reason}, retry in {remaining:.0f}s",
+                finish_reason="error",
+            )
+        
         try:
-            response = await acompletion(**kwargs)
-            return self._parse_response(response)
+            response = await self._acompletion_with_retry(kwargs)
+            result = self._parse_response(response)
         except Exception as e:
+            logger.warning("LLM call to {} failed: {}", model, e)
             # Return error as content for graceful handling
             return LLMResponse(
                 content=f"Error calling LLM: {str(e)}",
                 finish_reason="error",
             )
+        
+        if cache_key is not None and result.finish_reason != "error":
+            async with self._cache_lock:
+                self._cache[cache_key] = copy.deepcopy(result)
+                self._cache.move_to_end(cache_key)
+                while len(self._cache) > self.CACHE_MAXSIZE:
+                    self._cache.popitem(last=False)
+        return result
+    
+    async def _acompletion_with_retry(self, kwargs: dict[str, Any]) -> Any:
+        """Call acompletion, retrying rate limits and transient server errors with backoff."""
+        for attempt in range(self.MAX_RETRIES + 1):
+            # Rotate per attempt so a rate-limited retry moves to the next key
+            key = self._next_key()
+            if len(self._keys) > 1:
+                kwargs["api_key"] = key
+            try:
+                async with self._semaphore:
+                    start = time.perf_counter()
+                    response = await acompletion(**kwargs)
+                    logger.debug("LLM call to {} took {:.2f}s", kwargs["model"], time.perf_counter() - start)
+            except Exception as e:
+                if not _is_retryable(e):
+                    raise
+                retry_after = _retry_after(e)
+                # Bench the key when out of retries or the server wants a longer wait
+                # than we block for; give up unless another key is still available.
+                long_wait = (retry_after or 0.0) > self.RETRY_MAX_DELAY
+                if attempt >= self.MAX_RETRIES or long_wait:
+                    self._record_failure(key, retry_after)
+                if attempt >= self.MAX_RETRIES or self._cooldown_status()[0] > 0:
+                    raise
+                if long_wait:
+                    continue
+                if retry_after is None:
+                    delay = self.RETRY_BASE_DELAY * 2 ** attempt + random.uniform(0, self.RETRY_BASE_DELAY)
+                else:
+                    delay = retry_after
+                delay = min(self.RETRY_MAX_DELAY, delay)
+                logger.warning(
+                    "LLM call failed ({}), retry {}/{} in {:.2f}s",
+                    type(e).__name__, attempt + 1, self.MAX_RETRIES, delay,
+                )
+                await asyncio.sleep(delay)
+            else:
+                self._fails.pop(key, None)
+                return response
+    
+    def _next_key(self) -> str:
+        """Next key round-robin, skipping cooling keys (the first to recover if all are)."""
+        now = time.monotonic()
+        for _ in range(len(self._keys)):
+            key = self._keys[self._key_index]
+            self._key_index = (self._key_index + 1) % len(self._keys)
+            if self._cooldowns.get(key, (0.0, ""))[0] <= now:
+                return key
+        return min(self._keys, key=lambda k: self._cooldowns[k][0])
+    
+    def _cooldown_status(self) -> tuple[float, str]:
+        """Seconds until some key is usable again and why; (0, "") if one already is."""
+        until, reason = min(self._cooldowns.get(k, (0.0, "")) for k in self._keys)
+        remaining = until - time.monotonic()
+        return (remaining, reason) if remaining > 0 else (0.0, "")
+    
+    def _record_failure(self, key: str, retry_after: float | None) -> None:
+        """Cool a key down after a Retry-After hint or ALLOWED_FAILS consecutive failures."""
+        if retry_after is not None:
+            cooldown = retry_after
+            reason = "endpoint asked to retry later"
+        else:
+            self._fails[key] = self._fails.get(key, 0) + 1
+            if self._fails[key] < self.ALLOWED_FAILS:
+                return
+            cooldown = self.COOLDOWN_TIME
+            reason = "endpoint cooling down after repeated failures"
+        self._fails.pop(key, None)
+        until = time.monotonic() + cooldown
+        if until > self._cooldowns.get(key, (0.0, ""))[0]:
+            self._cooldowns[key] = (until, reason)
+        if len(self._keys) > 1:
+            logger.warning(
+                "LLM API key {}/{} cooling down for {:.0f}s",
+                self._keys.index(key) + 1, len(self._keys), cooldown,
+            )
+        else:
+            logger.warning("LLM endpoint cooling down for {:.0f}s", cooldown)
+    
+    @staticmethod
+    def _cache_key(
+        model: str,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        max_tokens: int,
+    ) -> bytes:
+        """Hash the parts of a request that determine a deterministic response."""
+        payload = json.dumps(
+            {"m": model, "msgs": messages, "t": tools, "mx": max_tokens},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).digest()
     
     def _parse_response(self, response: Any) -> LLMResponse:
         """Parse LiteLLM response into our standard format."""
@@ -172,37 +500,71 @@ class LiteLLMProvider(LLMProvider):
         message = choice.message
         
         tool_calls = []
-        if hasattr(message, "tool_calls") and message.tool_calls:
-            for tc in message.tool_calls:
+        if raw_tool_calls := getattr(message, "tool_calls", None):
+            for tc in raw_tool_calls:
+                fn = tc.function
                 # Parse arguments from JSON string if needed
-                args = tc.function.arguments
+                args = fn.arguments
                 if isinstance(args, str):
-                    args = json_repair.loads(args)
+                    try:
+                        args = _json_loads(args)
+                    except ValueError:
+                        # Models occasionally emit malformed JSON
+                        args = json_repair.loads(args)
                 
-                tool_calls.append(ToolCallRequest(
-                    id=tc.id,
-                    name=tc.function.name,
-                    arguments=args,
-                ))
+                tool_calls.append(ToolCallRequest(id=tc.id, name=fn.name, arguments=args))
         
         usage = {}
-        if hasattr(response, "usage") and response.usage:
+        if u := getattr(response, "usage", None):
             usage = {
-                "prompt_tokens": response.usage.prompt_tokens,
-                "completion_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens,
+                "prompt_tokens": u.prompt_tokens,
+                "completion_tokens": u.completion_tokens,
+                "total_tokens": u.total_tokens,
             }
         
-        reasoning_content = getattr(message, "reasoning_content", None)
-        
         return LLMResponse(
             content=message.content,
             tool_calls=tool_calls,
             finish_reason=choice.finish_reason or "stop",
             usage=usage,
-            reasoning_content=reasoning_content,
+            reasoning_content=getattr(message, "reasoning_content", None),
         )
     
     def get_default_model(self) -> str:
         """Get the default model."""
         return self.default_model
+
+    async def warmup(self) -> None:
+        """
+        Open a pooled connection to the endpoint so the first chat() skips DNS + TLS.
+
+        Only LiteLLM's OpenAI-SDK handler reuses `litellm.aclient_session`; other
+        providers (OpenRouter, Anthropic, Gemini, ...) use LiteLLM-internal clients,
+        so probing them would warm a connection nothing picks up.
+        """
+        if not self._uses_shared_client(self._resolve_model(self.default_model)):
+            return
+        spec = self._gateway or find_by_model(self.default_model)
+        url = self.api_base or (spec.default_api_base if spec else "")
+        if not url:
+            return
+        try:
+            # Any HTTP status (404/405 included) means the connection is established
+            await self._http_client.head(url, timeout=5.0)
+        except Exception as e:
+            # Best effort: a bad URL must never take down the gateway
+            logger.debug("Provider warmup failed for {}: {}", url, e)
+
+    def _uses_shared_client(self, model: str) -> bool:
+        """Whether LiteLLM routes this model through its OpenAI-SDK handler."""
+        try:
+            _, provider, _, _ = litellm.get_llm_provider(model, api_base=self.api_base)
+        except Exception:
+            return False
+        return provider in _SHARED_CLIENT_PROVIDERS
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        if litellm.aclient_session is self._http_client:
+            litellm.aclient_session = None
+        await self._http_client.aclose()
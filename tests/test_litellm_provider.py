@@ -0,0 +1,452 @@
+"""Tests for LiteLLMProvider request handling."""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import litellm
+import pytest
+
+import nanobot.providers.litellm_provider as litellm_provider
+from nanobot.providers.litellm_provider import LiteLLMProvider
+
+
+def _fake_response(content: str = "ok") -> SimpleNamespace:
+    """Build a minimal object shaped like a LiteLLM completion response."""
+    message = SimpleNamespace(content=content, tool_calls=None, reasoning_content=None)
+    usage = SimpleNamespace(prompt_tokens=1, completion_tokens=1, total_tokens=2)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=message, finish_reason="stop")],
+        usage=usage,
+    )
+
+
+@pytest.fixture
+def calls(monkeypatch) -> list[dict]:
+    """Patch acompletion and record every call's kwargs."""
+    recorded: list[dict] = []
+
+    async def fake_acompletion(**kwargs):
+        recorded.append(kwargs)
+        return _fake_response(f"reply {len(recorded)}")
+
+    monkeypatch.setattr(litellm_provider, "acompletion", fake_acompletion)
+    return recorded
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+class TestResponseCache:
+    async def test_deterministic_calls_are_cached(self, calls) -> None:
+        provider = LiteLLMProvider(default_model="deepseek/deepseek-chat")
+
+        first = await provider.chat(MESSAGES, temperature=0)
+        second = await provider.chat(MESSAGES, temperature=0)
+
+        assert len(calls) == 1
+        assert first.content == second.content == "reply 1"
+        assert first is not second
+        assert (provider.stats["hits"], provider.stats["misses"]) == (1, 1)
+
+    async def test_sampled_calls_bypass_cache(self, calls) -> None:
+        provider = LiteLLMProvider(default_model="deepseek/deepseek-chat")
+
+        await provider.chat(MESSAGES, temperature=0.7)
+        await provider.chat(MESSAGES, temperature=0.7)
+
+        assert len(calls) == 2
+        assert (provider.stats["hits"], provider.stats["misses"]) == (0, 0)
+
+    async def test_errors_are_not_cached(self, monkeypatch) -> None:
+        async def failing_acompletion(**kwargs):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(litellm_provider, "acompletion", failing_acompletion)
+        provider = LiteLLMProvider(default_model="deepseek/deepseek-chat")
+
+        response = await provider.chat(MESSAGES, temperature=0)
+
+        assert response.finish_reason == "error"
+        assert not provider._cache
+
+    async def test_lru_eviction(self, calls) -> None:
+        provider = LiteLLMProvider(default_model="deepseek/deepseek-chat")
+        provider.CACHE_MAXSIZE = 2
+
+        for text in ("a", "b", "c"):
+            await provider.chat([{"role": "user", "content": text}], temperature=0)
+        await provider.chat([{"role": "user", "content": "a"}], temperature=0)
+
+        assert len(calls) == 4
+        assert len(provider._cache) == 2
+
+
+async def test_shared_http_client_lifecycle() -> None:
+    provider = LiteLLMProvider(default_model="deepseek/deepseek-chat")
+    assert litellm_provider.litellm.aclient_session is provider._http_client
+
+    await provider.aclose()
+
+    assert litellm_provider.litellm.aclient_session is None
+    assert provider._http_client.is_closed
+
+
+class TestWarmup:
+    @staticmethod
+    def _record_heads(monkeypatch, provider: LiteLLMProvider) -> list[str]:
+        probed: list[str] = []
+
+        async def fake_head(url, **kwargs):
+            probed.append(url)
+
+        monkeypatch.setattr(provider._http_client, "head", fake_head)
+        return probed
+
+    async def test_probes_openai_compatible_gateway(self, monkeypatch) -> None:
+        provider = LiteLLMProvider(default_model="anthropic/claude-3", provider_name="aihubmix")
+        probed = self._record_heads(monkeypatch, provider)
+
+        await provider.warmup()
+
+        assert probed == ["https://aihubmix.com/v1"]
+
+    async def test_skips_providers_with_own_http_client(self, monkeypatch) -> None:
+        provider = LiteLLMProvider(default_model="anthropic/claude-opus-4-5", provider_name="openrouter")
+        probed = self._record_heads(monkeypatch, provider)
+
+        await provider.warmup()
+
+        assert probed == []
+
+    async def test_bad_url_does_not_raise(self, monkeypatch) -> None:
+        provider = LiteLLMProvider(default_model="anthropic/claude-3", provider_name="aihubmix")
+
+        async def bad_head(url, **kwargs):
+            raise httpx.InvalidURL("bad")
+
+        monkeypatch.setattr(provider._http_client, "head", bad_head)
+        await provider.warmup()
+
+
+class TestModelResolution:
+    def test_gateway_strips_and_reprefixes(self) -> None:
+        provider = LiteLLMProvider(provider_name="aihubmix")
+        assert provider._resolve_model("anthropic/claude-3") == "openai/claude-3"
+
+    def test_standard_provider_prefix(self) -> None:
+        provider = LiteLLMProvider()
+        assert provider._resolve_model("kimi-k2.5") == "moonshot/kimi-k2.5"
+
+    def test_model_overrides_applied(self) -> None:
+        provider = LiteLLMProvider()
+        kwargs = {"temperature": 0.7}
+        provider._apply_model_overrides("moonshot/kimi-k2.5", kwargs)
+        assert kwargs == {"temperature": 1.0}
+
+
+class TestEnvSetup:
+    def test_standard_provider_keeps_existing_env(self, monkeypatch) -> None:
+        monkeypatch.setenv("ZAI_API_KEY", "from-env")
+        # setenv first so monkeypatch restores the variable _setup_env adds
+        monkeypatch.setenv("ZHIPUAI_API_KEY", "")
+        monkeypatch.delenv("ZHIPUAI_API_KEY")
+
+        LiteLLMProvider(api_key="from-config", default_model="glm-4")
+
+        assert litellm_provider.os.environ["ZAI_API_KEY"] == "from-env"
+        assert litellm_provider.os.environ["ZHIPUAI_API_KEY"] == "from-config"
+
+    def test_gateway_overrides_existing_env(self, monkeypatch) -> None:
+        monkeypatch.setenv("OPENROUTER_API_KEY", "from-env")
+
+        LiteLLMProvider(api_key="sk-or-config", provider_name="openrouter")
+
+        assert litellm_provider.os.environ["OPENROUTER_API_KEY"] == "sk-or-config"
+
+
+def _rate_limit_error(retry_after: str | None = None) -> Exception:
+    headers = {"retry-after": retry_after} if retry_after is not None else {}
+    response = httpx.Response(429, headers=headers, request=httpx.Request("POST", "https://x"))
+    return litellm.RateLimitError("slow down", "openai", "m", response=response)
+
+
+class TestRetries:
+    async def test_sdk_retries_disabled(self, calls) -> None:
+        provider = LiteLLMProvider(default_model="deepseek/deepseek-chat")
+
+        await provider.chat(MESSAGES)
+
+        assert calls[0]["max_retries"] == 0
+
+    async def test_rate_limit_is_retried(self, monkeypatch) -> None:
+        attempts = 0
+
+        async def flaky_acompletion(**kwargs):
+            nonlocal attempts
+            attempts += 1
+            if attempts < 3:
+                raise _rate_limit_error("0")
+            return _fake_response()
+
+        monkeypatch.setattr(litellm_provider, "acompletion", flaky_acompletion)
+        provider = LiteLLMProvider(default_model="deepseek/deepseek-chat")
+
+        response = await provider.chat(MESSAGES)
+
+        assert attempts == 3
+        assert response.content == "ok"
+
+    async def test_gives_up_after_max_retries(self, monkeypatch) -> None:
+        attempts = 0
+
+        async def limited_acompletion(**kwargs):
+            nonlocal attempts
+            attempts += 1
+            raise _rate_limit_error()
+
+        monkeypatch.setattr(litellm_provider, "acompletion", limited_acompletion)
+        provider = LiteLLMProvider(default_model="deepseek/deepseek-chat")
+        provider.RETRY_BASE_DELAY = 0
+
+        response = await provider.chat(MESSAGES)
+
+        assert attempts == provider.MAX_RETRIES + 1
+        assert response.finish_reason == "error"
+
+    async def test_long_retry_after_is_not_waited(self, monkeypatch) -> None:
+        attempts = 0
+
+        async def limited_acompletion(**kwargs):
+            nonlocal attempts
+            attempts += 1
+            raise _rate_limit_error("120")
+
+        monkeypatch.setattr(litellm_provider, "acompletion", limited_acompletion)
+        provider = LiteLLMProvider(default_model="deepseek/deepseek-chat")
+
+        response = await provider.chat(MESSAGES)
+
+        assert attempts == 1
+        assert response.finish_reason == "error"
+
+    async def test_non_retryable_error_fails_fast(self, monkeypatch) -> None:
+        attempts = 0
+
+        async def failing_acompletion(**kwargs):
+            nonlocal attempts
+            attempts += 1
+            raise ValueError("bad request")
+
+        monkeypatch.setattr(litellm_provider, "acompletion", failing_acompletion)
+        provider = LiteLLMProvider(default_model="deepseek/deepseek-chat")
+
+        await provider.chat(MESSAGES)
+
+        assert attempts == 1
+
+
+def _connection_error(cause: Exception | None) -> Exception:
+    error = litellm.APIConnectionError("failed", "openai", "m")
+    error.__cause__ = cause
+    return error
+
+
+@pytest.mark.parametrize(
+    ("error", "retryable"),
+    [
+        (_connection_error(httpx.ConnectError("refused")), True),
+        (_connection_error(ConnectionResetError()), True),
+        (_connection_error(KeyError("choices")), False),
+        (_connection_error(None), False),
+        (_connection_error(httpx.ReadTimeout("slow")), False),
+        (litellm.Timeout("slow", "m", "openai"), False),
+    ],
+)
+def test_connection_errors_retried_only_for_transport_failures(error, retryable) -> None:
+    assert litellm_provider._is_retryable(error) is retryable
+
+
+class TestCooldown:
+    async def test_retry_after_starts_cooldown(self, monkeypatch) -> None:
+        attempts = 0
+
+        async def limited_acompletion(**kwargs):
+            nonlocal attempts
+            attempts += 1
+            raise _rate_limit_error("120")
+
+        monkeypatch.setattr(litellm_provider, "acompletion", limited_acompletion)
+        provider = LiteLLMProvider(default_model="deepseek/deepseek-chat")
+
+        await provider.chat(MESSAGES)
+        response = await provider.chat(MESSAGES)
+
+        assert attempts == 1
+        assert response.finish_reason == "error"
+        assert "retry later" in response.content
+        assert provider.stats["cooldown_skips"] == 1
+
+    async def test_consecutive_failures_start_cooldown(self, monkeypatch) -> None:
+        attempts = 0
+
+        async def down_acompletion(**kwargs):
+            nonlocal attempts
+            attempts += 1
+            raise litellm.ServiceUnavailableError("down", "openai", "m")
+
+        monkeypatch.setattr(litellm_provider, "acompletion", down_acompletion)
+        provider = LiteLLMProvider(default_model="deepseek/deepseek-chat")
+        provider.MAX_RETRIES = 0
+
+        for _ in range(provider.ALLOWED_FAILS + 2):
+            response = await provider.chat(MESSAGES)
+
+        assert attempts == provider.ALLOWED_FAILS
+        assert "after repeated failures" in response.content
+        assert provider.stats["cooldown_skips"] == 2
+
+    async def test_success_resets_failure_count(self, monkeypatch, calls) -> None:
+        provider = LiteLLMProvider(default_model="deepseek/deepseek-chat")
+        provider._fails[""] = provider.ALLOWED_FAILS - 1
+
+        await provider.chat(MESSAGES)
+
+        assert provider._fails == {}
+
+    async def test_cooling_key_is_skipped(self, monkeypatch) -> None:
+        used: list[str] = []
+
+        async def acompletion_per_key(**kwargs):
+            used.append(kwargs["api_key"])
+            if kwargs["api_key"] == "key-a":
+                raise _rate_limit_error("120")
+            return _fake_response()
+
+        monkeypatch.setattr(litellm_provider, "acompletion", acompletion_per_key)
+        monkeypatch.setenv("DEEPSEEK_API_KEY", "from-env")
+        provider = LiteLLMProvider(
+            api_key="key-a", api_keys=["key-b"], default_model="deepseek/deepseek-chat",
+        )
+
+        responses = [await provider.chat(MESSAGES) for _ in range(3)]
+
+        assert [r.content for r in responses] == ["ok", "ok", "ok"]
+        assert used == ["key-a", "key-b", "key-b", "key-b"]
+        assert provider.stats["cooldown_skips"] == 0
+
+    async def test_fails_only_when_every_key_is_cooling(self, monkeypatch) -> None:
+        attempts = 0
+
+        async def limited_acompletion(**kwargs):
+            nonlocal attempts
+            attempts += 1
+            raise _rate_limit_error("120")
+
+        monkeypatch.setattr(litellm_provider, "acompletion", limited_acompletion)
+        monkeypatch.setenv("DEEPSEEK_API_KEY", "from-env")
+        provider = LiteLLMProvider(
+            api_key="key-a", api_keys=["key-b"], default_model="deepseek/deepseek-chat",
+        )
+
+        first = await provider.chat(MESSAGES)
+        second = await provider.chat(MESSAGES)
+
+        assert attempts == 2
+        assert first.finish_reason == second.finish_reason == "error"
+        assert provider.stats["cooldown_skips"] == 1
+
+
+@pytest.mark.parametrize(("max_inflight", "expected_peak"), [(2, 2), (0, 6)])
+async def test_inflight_limit(monkeypatch, max_inflight, expected_peak) -> None:
+    active = peak = 0
+
+    async def slow_acompletion(**kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return _fake_response()
+
+    monkeypatch.setattr(litellm_provider, "acompletion", slow_acompletion)
+    provider = LiteLLMProvider(default_model="deepseek/deepseek-chat", max_inflight=max_inflight)
+
+    await asyncio.gather(*(provider.chat(MESSAGES) for _ in range(6)))
+
+    assert peak == expected_peak
+
+
+async def test_api_keys_rotate_round_robin(calls, monkeypatch) -> None:
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "from-env")
+    provider = LiteLLMProvider(
+        api_key="key-a", api_keys=["key-b", "key-a"], default_model="deepseek/deepseek-chat",
+    )
+
+    for _ in range(3):
+        await provider.chat(MESSAGES)
+
+    assert [c["api_key"] for c in calls] == ["key-a", "key-b", "key-a"]
+
+
+def test_parse_response_tool_calls() -> None:
+    tool_call = SimpleNamespace(
+        id="call_1",
+        function=SimpleNamespace(name="read_file", arguments='{"path": "a.txt"}'),
+    )
+    raw = _fake_response(None)
+    raw.choices[0].message.tool_calls = [tool_call]
+    raw.choices[0].finish_reason = "tool_calls"
+
+    response = LiteLLMProvider()._parse_response(raw)
+
+    assert response.has_tool_calls
+    assert response.tool_calls[0].name == "read_file"
+    assert response.tool_calls[0].arguments == {"path": "a.txt"}
+    assert response.usage["total_tokens"] == 2
+    with pytest.raises(AttributeError):
+        response.content = "changed"
+
+
+def test_parse_response_repairs_malformed_arguments() -> None:
+    tool_call = SimpleNamespace(
+        id="call_1",
+        function=SimpleNamespace(name="read_file", arguments='{"path": "a.txt",}'),
+    )
+    raw = _fake_response(None)
+    raw.choices[0].message.tool_calls = [tool_call]
+
+    response = LiteLLMProvider()._parse_response(raw)
+
+    assert response.tool_calls[0].arguments == {"path": "a.txt"}
+
+
+class TestPromptCaching:
+    LONG = "x" * (litellm_provider.PROMPT_CACHE_MIN_CHARS + 1)
+
+    async def test_long_system_prompt_is_marked_for_anthropic(self, calls) -> None:
+        provider = LiteLLMProvider(default_model="anthropic/claude-opus-4-5")
+        messages = [{"role": "system", "content": self.LONG}, {"role": "user", "content": "hi"}]
+
+        await provider.chat(messages)
+
+        sent = calls[0]["messages"]
+        assert sent[0]["content"][0]["cache_control"] == {"type": "ephemeral"}
+        assert sent[1] == {"role": "user", "content": "hi"}
+        assert messages[0]["content"] == self.LONG
+
+    async def test_not_marked_for_other_providers(self, calls) -> None:
+        provider = LiteLLMProvider(default_model="deepseek/deepseek-chat")
+
+        await provider.chat([{"role": "system", "content": self.LONG}])
+
+        assert calls[0]["messages"][0]["content"] == self.LONG
+
+    def test_marker_limit(self) -> None:
+        messages = [{"role": "system", "content": self.LONG}]
+        messages += [{"role": "user", "content": self.LONG + str(i)} for i in range(6)]
+
+        result = litellm_provider._apply_prompt_caching(messages)
+
+        marked = [i for i, m in enumerate(result) if isinstance(m["content"], list)]
+        assert marked == [0, 4, 5, 6]
@@ -0,0 +1,103 @@
+"""Tests for the web_search and web_fetch tools."""
+
+import httpx
+
+from nanobot.agent.subagent import SubagentManager
+from nanobot.agent.tools.web import WebFetchTool, WebSearchTool
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+
+async def test_web_search_reuses_one_client(monkeypatch) -> None:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        results = [{"title": "Nanobot", "url": "https://example.com", "description": "A bot"}]
+        return httpx.Response(200, json={"web": {"results": results}})
+
+    real_client = httpx.AsyncClient
+    clients: list[httpx.AsyncClient] = []
+
+    def make_client(**kwargs) -> httpx.AsyncClient:
+        clients.append(real_client(transport=httpx.MockTransport(handler), **kwargs))
+        return clients[-1]
+
+    monkeypatch.setattr(httpx, "AsyncClient", make_client)
+    tool = WebSearchTool(api_key="key")
+
+    first = await tool.execute("nanobot")
+    second = await tool.execute("nanobot", count=1)
+
+    assert len(clients) == 1
+    assert len(requests) == 2
+    assert requests[0].headers["X-Subscription-Token"] == "key"
+    assert "1. Nanobot" in first and "1. Nanobot" in second
+
+    await tool.aclose()
+    assert clients[0].is_closed
+    assert tool._client is None
+
+
+class SearchingProvider(LLMProvider):
+    """Provider stub that searches once, then answers."""
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+        if messages[-1]["role"] == "tool":
+            return LLMResponse(content="done")
+        call = ToolCallRequest(id="c1", name="web_search", arguments={"query": "nanobot"})
+        return LLMResponse(content=None, tool_calls=[call])
+
+    def get_default_model(self) -> str:
+        return "test-model"
+
+
+async def test_subagent_closes_search_client(monkeypatch, tmp_path) -> None:
+    real_client = httpx.AsyncClient
+    clients: list[httpx.AsyncClient] = []
+
+    def make_client(**kwargs) -> httpx.AsyncClient:
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json={}))
+        clients.append(real_client(transport=transport, **kwargs))
+        return clients[-1]
+
+    monkeypatch.setattr(httpx, "AsyncClient", make_client)
+    manager = SubagentManager(SearchingProvider(), tmp_path, MessageBus(), brave_api_key="key")
+
+    await manager._run_subagent("t1", "search", "search", {"channel": "cli", "chat_id": "direct"})
+
+    assert len(clients) == 1
+    assert clients[0].is_closed
+
+
+class TestWebFetchExtract:
+    def test_json_is_pretty_printed(self) -> None:
+        r = httpx.Response(200, json={"a": 1})
+
+        text, extractor = WebFetchTool()._extract(r, "markdown")
+
+        assert extractor == "json"
+        assert text == '{\n  "a": 1\n}'
+
+    def test_html_goes_through_readability(self) -> None:
+        page = (
+            "<html><head><title>Doc</title></head><body><article>"
+            "<p>Nanobot is an ultra-lightweight personal assistant with a small codebase "
+            "that is easy to read, modify and extend for research.</p>"
+            '<p>See <a href="https://example.com">the docs</a>.</p>'
+            "</article></body></html>"
+        )
+        r = httpx.Response(200, html=page)
+
+        text, extractor = WebFetchTool()._extract(r, "markdown")
+
+        assert extractor == "readability"
+        assert text.startswith("# Doc\n\n")
+        assert "[the docs](https://example.com)" in text
+
+    def test_other_content_is_returned_raw(self) -> None:
+        r = httpx.Response(200, text="plain <b>text</b>")
+
+        text, extractor = WebFetchTool()._extract(r, "text")
+
+        assert (text, extractor) == ("plain <b>text</b>", "raw")